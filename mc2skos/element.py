@@ -4,32 +4,123 @@ from functools import reduce
 from lxml import etree
 import re
 
+MARC_NS = 'http://www.loc.gov/MARC21/slim'
+
+# Namespace qualified tag names in Clark notation, for use with iterparse and iterchildren
+RECORD = '{%s}record' % MARC_NS
+DATAFIELD = '{%s}datafield' % MARC_NS
+SUBFIELD = '{%s}subfield' % MARC_NS
+
+# Simple paths, like 'mx:datafield[@tag="040"]/mx:subfield[@code="b"]', that
+# lxml's ElementPath evaluates the same way as XPath, only faster.
+SIMPLE_STEP = r'(?:[\w.-]+:)?[\w.-]+(?:\[@[\w.-]+="[^"]*"\])*'
+SIMPLE_PATH = re.compile(r'^%s(?:/%s)*$' % (SIMPLE_STEP, SIMPLE_STEP))
+
+# Subfields starting with one of these characters are not preceded by a space
+# when stringified.
+NO_SPACE_BEFORE = frozenset('.?#@+,<>%~`!$^&():;]')
+
+
+def flatten_text(node):
+    # Captions can include Processing Instruction tags, like in this example
+    # (linebreaks added):
+    #
+    #   <mx:subfield xmlns:mx="http://www.loc.gov/MARC21/slim"
+    #                xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" code="t">
+    #     <?ddc fotag="fo:inline" font-style="italic"?>L
+    #       <?ddc fotag="fo:inline" vertical-align="super" font-size="70%"?>p
+    #       <?ddc fotag="/fo:inline"?>
+    #     <?ddc fotag="/fo:inline"?>-rom
+    #   </mx:subfield>
+    #
+    # The code below just strips away the PI tags, giving "Lp-rom" for this example.
+    if len(node) != 0:
+        return ''.join(child.tail for child in node if child.tail is not None)
+    return node.text
+
+
+def join_subfield(label, subfield):
+    # Reducer function used by Element.stringify. Takes a plain lxml subfield node.
+    code = subfield.get('code')
+    value = flatten_text(subfield)
+    if not value:
+        return label
+
+    # Check if we need to add a separator
+    if code == 'c':
+        # Treat $c as the end of a number span, which is correct for the 6XX fields
+        # in MARC21 Classification. In Marc21 Authority, $c generally seems to be
+        # undefined, but we might add some checks here if there are some $c subfields
+        # that need to be treated differently.
+        value = '-' + value
+
+    elif label and value[0] not in NO_SPACE_BEFORE:
+        # Unless the subfield starts with a punctuation character, we will add a space.
+        value = ' ' + value
+
+    return label + value
+
 
 class Element(object):
 
     nsmap = {
-        'mx': 'http://www.loc.gov/MARC21/slim',
-        'marc': 'http://www.loc.gov/MARC21/slim',
+        'mx': MARC_NS,
+        'marc': MARC_NS,
     }
 
+    # Compiled XPath expressions, keyed by expression string
+    xpaths = {}
+
+    # Whether each expression is a simple path, keyed by expression string
+    simple_paths = {}
+
     def __init__(self, data):
         if isinstance(data, etree._Element):
             self.node = data
         else:
             self.node = etree.fromstring(data)
 
+    @classmethod
+    def compile(cls, xpath):
+        # Returns the compiled XPath object for an expression. Each expression is
+        # only parsed and compiled once, and then reused for every record.
+        compiled = cls.xpaths.get(xpath)
+        if compiled is None:
+            compiled = etree.XPath(xpath, namespaces=cls.nsmap)
+            cls.xpaths[xpath] = compiled
+        return compiled
+
     def get(self, name):
         return self.node.get(name)
 
     def all(self, xpath):
         # Yields all nodes matching the xpath
-        for res in self.node.xpath(xpath, namespaces=self.nsmap):
+        for res in self.compile(xpath)(self.node):
+            yield Element(res)
+
+    def children(self, tag):
+        # Yields all child elements with the given tag (in Clark notation).
+        # Faster than all() for the common case of just iterating over fields.
+        for res in self.node.iterchildren(tag):
             yield Element(res)
 
+    def find(self, xpath):
+        # Returns the first lxml node matching the xpath, or None. Simple paths
+        # are evaluated with ElementPath, which is faster than the XPath engine
+        # for single node lookups. Anything else falls back to XPath.
+        simple = self.simple_paths.get(xpath)
+        if simple is None:
+            simple = self.simple_paths[xpath] = SIMPLE_PATH.match(xpath) is not None
+        if simple:
+            return self.node.find(xpath, self.nsmap)
+        for res in self.compile(xpath)(self.node):
+            return res
+
     def first(self, xpath):
         # Returns first node or None
-        for res in self.all(xpath):
-            return res
+        res = self.find(xpath)
+        if res is not None:
+            return Element(res)
 
     def text(self, xpath=None, all=False):
         # xpath: the xpath
@@ -37,62 +128,32 @@ class Element(object):
         #      False to return a string with the text content of the first matching element, or None.
         # Returns text content of first node or None
 
-        def flatten_text(node):
-            # Captions can include Processing Instruction tags, like in this example
-            # (linebreaks added):
-            #
-            #   <mx:subfield xmlns:mx="http://www.loc.gov/MARC21/slim"
-            #                xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" code="t">
-            #     <?ddc fotag="fo:inline" font-style="italic"?>L
-            #       <?ddc fotag="fo:inline" vertical-align="super" font-size="70%"?>p
-            #       <?ddc fotag="/fo:inline"?>
-            #     <?ddc fotag="/fo:inline"?>-rom
-            #   </mx:subfield>
-            #
-            # The code below just strips away the PI tags, giving "Lp-rom" for this example.
-            children = node.getchildren()
-            if len(children) != 0:
-                value = ''
-                for child in children:
-                    if child.tail is not None:
-                        value += child.tail
-            else:
-                value = node.text
-            return value
-
         if xpath is None:
             return flatten_text(self.node)
         if all:
-            return [flatten_text(res.node) for res in self.all(xpath) if res.node.text is not None]
-        for res in self.all(xpath):
-            return flatten_text(res.node)  # return text of first element
+            return [flatten_text(res) for res in self.compile(xpath)(self.node) if res.text is not None]
+        res = self.find(xpath)
+        if res is not None:
+            return flatten_text(res)  # return text of first element
 
     def get_ess_codes(self):
-        return [x[4:] for x in self.node.xpath('mx:subfield[@code="9"]/text()', namespaces=self.nsmap) if x.find('ess=') == 0]
+        codes = []
+        for sf in self.node.iterchildren(SUBFIELD):
+            if sf.get('code') == '9' and sf.text is not None and sf.text.startswith('ess='):
+                codes.append(sf.text[4:])
+        return codes
 
     def reduce(self, fn, subfields=['a', 'c', 'i', 't', 'x'], initializer=''):
-        codes = ['@code="%s"' % code for code in subfields]
-        return reduce(fn, self.all('mx:subfield[%s]' % ' or '.join(codes)), initializer)
-
-    def stringify(self, subfields=['a', 'c', 'i', 't', 'x']):
-        def inner(label, subfield):
-            code = subfield.get('code')
-            value = subfield.text()
-            if value is None:
-                return label
-
-            # Check if we need to add a separator
-            if code == 'c':
-                # Treat $c as the end of a number span, which is correct for the 6XX fields
-                # in MARC21 Classification. In Marc21 Authority, $c generally seems to be
-                # undefined, but we might add some checks here if there are some $c subfields
-                # that need to be treated differently.
-                value = '-' + value
-
-            elif len(label) != 0 and not re.match(r'[.\?#@+,<>%~`!$^&\(\):;\]]', value[0]):
-                # Unless the subfield starts with a punctuation character, we will add a space.
-                value = ' ' + value
-
-            return label + value
-
-        return self.reduce(inner, subfields)
+        # Reduces the matching subfields with fn, which gets each subfield as an
+        # Element. Note that join_subfield, used by stringify(), takes plain lxml
+        # nodes instead.
+        codes = frozenset(subfields)
+        return reduce(fn, (sf for sf in self.children(SUBFIELD) if sf.get('code') in codes), initializer)
+
+    def stringify(self, subfields=['a', 'c', 'i', 't', 'x'], nodes=None):
+        # nodes: The subfield nodes (lxml elements) of this field, if they have
+        #        already been fetched by the caller. Saves another pass over the field.
+        if nodes is None:
+            nodes = self.node.iterchildren(SUBFIELD)
+        codes = frozenset(subfields)
+        return reduce(join_subfield, (sf for sf in nodes if sf.get('code') in codes), '')
@@ -9,14 +9,25 @@ import sys
 import re
 import time
 import warnings
+from collections import deque
+from multiprocessing import Pool
 from datetime import datetime
 from iso639 import languages
 import argparse
 from rdflib.namespace import OWL, RDF, SKOS, DCTERMS, XSD, Namespace
 from rdflib import URIRef, Literal, Graph, BNode
+try:
+    from rdflib.plugins.stores.memory import SimpleMemory  # rdflib >= 6
+except ImportError:
+    from rdflib.plugins.memory import Memory as SimpleMemory
+from lxml import etree
 from otsrdflib import OrderedTurtleSerializer
 import json
 import rdflib_jsonld.serializer as json_ld
+try:
+    import orjson  # Optional, faster JSON encoding for NDJSON output
+except ImportError:
+    orjson = None
 import pkg_resources
 import skosify
 
@@ -46,112 +57,140 @@ logger.addHandler(console_handler)
 WD = Namespace('http://data.ub.uio.no/webdewey-terms#')
 MADS = Namespace('http://www.loc.gov/mads/rdf/v1#')
 
+TRUE = Literal(True)
+
+# Sort keys for concepts in Turtle output. The patterns are compiled once here,
+# since they are matched against every concept URI.
+TURTLE_SORTERS = [
+    (re.compile(r'/([0-9A-Z\-]+)--([0-9.\-;:]+)/e'), lambda x: 'C%s--%s' % (x[0], x[1])),  # table numbers
+    (re.compile(r'/([0-9.\-;:]+)/e'), lambda x: 'B' + x[0]),  # standard schedule numbers
+    (re.compile(r'^(.+)$'), lambda x: 'A' + x[0]),  # fallback
+]
+
+# Inverse relations that are added to the graph with the --expand option
+INVERSE_RELATIONS = {
+    SKOS.broader: SKOS.narrower,
+    SKOS.narrower: SKOS.broader,
+    SKOS.related: SKOS.related,
+}
+
+# Note properties of Record, and the SKOS properties they are mapped to.
+# The namespace attribute lookups are done once here instead of for every record.
+NOTE_PROPERTIES = [
+    ('definition', SKOS.definition),
+    ('note', SKOS.note),
+    ('editorialNote', SKOS.editorialNote),
+    ('scopeNote', SKOS.scopeNote),
+    ('historyNote', SKOS.historyNote),
+    ('changeNote', SKOS.changeNote),
+    ('example', SKOS.example),
+]
+
 
 def add_record_to_graph(graph, record, options):
     # Add record to graph
 
     # logger.debug('Adding: %s', record.uri)
 
+    # Triples are collected and added to the graph in one batch at the end
+    triples = []
+
     # Strictly, we do not need to explicitly state here that <A> and <B> are instances
     # of skos:Concept, because such statements are entailed by the definition
     # of skos:semanticRelation.
     record_uri = URIRef(record.uri)
 
-    graph.add((record_uri, RDF.type, SKOS.Concept))
+    triples.append((record_uri, RDF.type, SKOS.Concept))
 
     # Add skos:topConceptOf or skos:inScheme
     for scheme_uri in record.scheme_uris:
+        scheme_ref = URIRef(scheme_uri)
         if record.is_top_concept:
-            graph.add((record_uri, SKOS.topConceptOf, URIRef(scheme_uri)))
+            triples.append((record_uri, SKOS.topConceptOf, scheme_ref))
+            if options.get('expand'):
+                triples.append((scheme_ref, SKOS.hasTopConcept, record_uri))
+                triples.append((record_uri, SKOS.inScheme, scheme_ref))
         else:
-            graph.add((record_uri, SKOS.inScheme, URIRef(scheme_uri)))
+            triples.append((record_uri, SKOS.inScheme, scheme_ref))
 
     if record.created is not None:
-        graph.add((record_uri, DCTERMS.created, Literal(record.created.strftime('%F'), datatype=XSD.date)))
+        triples.append((record_uri, DCTERMS.created, Literal(record.created.date().isoformat(), datatype=XSD.date)))
 
     if record.modified is not None:
-        graph.add((record_uri, DCTERMS.modified, Literal(record.modified.strftime('%F'), datatype=XSD.date)))
+        triples.append((record_uri, DCTERMS.modified, Literal(record.modified.date().isoformat(), datatype=XSD.date)))
 
     # Add classification number as skos:notation
     if record.notation:
         if record.record_type == Constants.TABLE_RECORD:  # OBS! Sjekk add tables
-            graph.add((record_uri, SKOS.notation, Literal('T' + record.notation)))
+            triples.append((record_uri, SKOS.notation, Literal('T' + record.notation)))
         else:
-            graph.add((record_uri, SKOS.notation, Literal(record.notation)))
+            triples.append((record_uri, SKOS.notation, Literal(record.notation)))
 
     # Add local control number as dcterms:identifier
     if record.control_number:
-        graph.add((record_uri, DCTERMS.identifier, Literal(record.control_number)))
+        triples.append((record_uri, DCTERMS.identifier, Literal(record.control_number)))
 
     # Add caption as skos:prefLabel
+    alt_labels = record.altLabel
     if record.prefLabel:
-        graph.add((record_uri, SKOS.prefLabel, Literal(record.prefLabel, lang=record.lang)))
-    elif options.get('include_webdewey') and len(record.altLabel) != 0:
+        triples.append((record_uri, SKOS.prefLabel, Literal(record.prefLabel, lang=record.lang)))
+    elif options.get('include_webdewey') and len(alt_labels) != 0:
         # If the --webdewey flag is set, we will use the first index term as prefLabel
-        caption = record.altLabel.pop(0)['term']
-        if len(record.altLabel) != 0:
+        caption = alt_labels[0]['term']
+        alt_labels = alt_labels[1:]
+        if len(alt_labels) != 0:
             caption = caption + ', …'
-        graph.add((record_uri, SKOS.prefLabel, Literal(caption, lang=record.lang)))
+        triples.append((record_uri, SKOS.prefLabel, Literal(caption, lang=record.lang)))
 
     # Add index terms as skos:altLabel
     if options.get('include_altlabels'):
-        for label in record.altLabel:
-            graph.add((record_uri, SKOS.altLabel, Literal(label['term'], lang=record.lang)))
+        alt_label = SKOS.altLabel  # Namespace attribute lookups are not free, so do it once
+        for label in alt_labels:
+            triples.append((record_uri, alt_label, Literal(label['term'], lang=record.lang)))
 
     # Add relations (SKOS:broader, SKOS:narrower, SKOS:xxxMatch, etc.)
     for relation in record.relations:
         if relation.get('uri') is not None:
-            graph.add((record_uri, relation.get('relation'), URIRef(relation['uri'])))
+            triples.append((record_uri, relation.get('relation'), URIRef(relation['uri'])))
+            if options.get('expand') and relation.get('relation') in INVERSE_RELATIONS:
+                # Add the inverse relation here, so we don't need another pass over the graph
+                triples.append((URIRef(relation['uri']), INVERSE_RELATIONS[relation['relation']], record_uri))
 
     # Add notes
     if not options.get('exclude_notes'):
-        for note in record.definition:
-            graph.add((record_uri, SKOS.definition, Literal(note, lang=record.lang)))
-
-        for note in record.note:
-            graph.add((record_uri, SKOS.note, Literal(note, lang=record.lang)))
-
-        for note in record.editorialNote:
-            graph.add((record_uri, SKOS.editorialNote, Literal(note, lang=record.lang)))
-
-        for note in record.scopeNote:
-            graph.add((record_uri, SKOS.scopeNote, Literal(note, lang=record.lang)))
-
-        for note in record.historyNote:
-            graph.add((record_uri, SKOS.historyNote, Literal(note, lang=record.lang)))
-
-        for note in record.changeNote:
-            graph.add((record_uri, SKOS.changeNote, Literal(note, lang=record.lang)))
-
-        for note in record.example:
-            graph.add((record_uri, SKOS.example, Literal(note, lang=record.lang)))
+        for attr, prop in NOTE_PROPERTIES:
+            for note in getattr(record, attr):
+                triples.append((record_uri, prop, Literal(note, lang=record.lang)))
 
     # Deprecated?
     if record.deprecated:
-        graph.add((record_uri, OWL.deprecated, Literal(True)))
+        triples.append((record_uri, OWL.deprecated, TRUE))
 
     # Add synthesized number components
     if options.get('include_components') and len(record.components) != 0:
-        component = record.components.pop(0)
-        component_uri = URIRef(record.scheme.uri('concept', collection='class', object=component))
-        b1 = BNode()
-        graph.add((record_uri, MADS.componentList, b1))
-        graph.add((b1, RDF.first, component_uri))
-
+        rdf_first, rdf_rest = RDF.first, RDF.rest
+        get_uri = record.scheme.uri
+        b1 = None
         for component in record.components:
-            component_uri = URIRef(record.scheme.uri('concept', collection='class', object=component))
+            component_uri = URIRef(get_uri('concept', collection='class', object=component))
             b2 = BNode()
-            graph.add((b1, RDF.rest, b2))
-            graph.add((b2, RDF.first, component_uri))
+            if b1 is None:
+                triples.append((record_uri, MADS.componentList, b2))
+            else:
+                triples.append((b1, rdf_rest, b2))
+            triples.append((b2, rdf_first, component_uri))
             b1 = b2
 
-        graph.add((b1, RDF.rest, RDF.nil))
+        triples.append((b1, rdf_rest, RDF.nil))
 
     # Add webDewey extras
     if options.get('include_webdewey'):
         for key, values in record.webDeweyExtras.items():
+            prop = WD[key]
             for value in values:
-                graph.add((record_uri, WD[key], Literal(value, lang=record.lang)))
+                triples.append((record_uri, prop, Literal(value, lang=record.lang)))
+
+    graph.addN((s, p, o, graph) for s, p, o in triples)
 
 
 def process_record(graph, rec, **kwargs):
@@ -164,6 +203,8 @@ def process_record(graph, rec, **kwargs):
     if leader[6] == 'w':
         if kwargs.get('skip_classification'):
             return
+        # Only public records are converted, so the rest can be parsed partially
+        kwargs['public_only'] = True
         rec = ClassificationRecord(el, kwargs)
     elif leader[6] == 'z':
         if kwargs.get('skip_authority'):
@@ -177,19 +218,217 @@ def process_record(graph, rec, **kwargs):
         add_record_to_graph(graph, rec, kwargs)
 
 
+def serialize_records(records, batch_size):
+    # Serialize records to bytes in batches of (record number, data) tuples,
+    # so that they can be sent to worker processes.
+    batch = []
+    for n, record in enumerate(records, 1):
+        batch.append((n, etree.tostring(record)))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RecordCollector(object):
+    """Collects the triples of each record separately, using the addN() method of Graph.
+
+    process_record() adds all triples of a record in a single addN() call.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def addN(self, quads):
+        self.records.append([(s, p, o) for s, p, o, _ in quads])
+
+
+def _process_batch(batch, options):
+    # Convert a batch of serialized records in a worker process. The options are
+    # sent along with each batch, so the workers don't keep any state. Returns the
+    # resulting triples, as one list per record, and the records that had to
+    # be ignored. Keeping the records apart means that a graph, or a writer
+    # like NDJSONWriter, gets one addN() call per record as with a single process.
+    collector = RecordCollector()
+    ignored = []
+    for n, data in batch:
+        try:
+            process_record(collector, data, **options)
+        except InvalidRecordError as e:
+            ignored.append((e.control_number or '#%d' % n, str(e)))
+    return collector.records, ignored
+
+
+def process_records_parallel(records, graph, jobs, batch_size=100, **options):
+    """Convert records using a pool of worker processes and add the result to graph."""
+
+    def merge(result):
+        records, ignored = result
+        for triples in records:
+            graph.addN((s, p, o, graph) for s, p, o in triples)
+        for record_id, msg in ignored:
+            logger.warning('Ignoring record %s: %s', record_id, msg)
+
+    pool = Pool(jobs)
+    try:
+        # Keep a bounded number of batches in flight, so we don't read the
+        # whole file into memory if the workers can't keep up.
+        pending = deque()
+        for batch in serialize_records(records, batch_size):
+            pending.append(pool.apply_async(_process_batch, (batch, options)))
+            if len(pending) >= 2 * jobs:
+                merge(pending.popleft().get())
+        while pending:
+            merge(pending.popleft().get())
+    finally:
+        pool.close()
+        pool.join()
+
+
+class NTriplesWriter(object):
+    """Write triples to a stream as N-Triples while records are being processed.
+
+    Supports the addN() method of Graph, so it can be used in place of a graph
+    with process_records() when no further processing of the graph is needed.
+    Only a small buffer of triples is kept in memory at any time, so duplicate
+    triples are only removed within the buffer.
+    """
+
+    def __init__(self, stream, buffer_size=10000):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = Graph(store=SimpleMemory())
+        self.buffered = 0
+        self.written = 0
+
+    def addN(self, quads):
+        for s, p, o, _ in quads:
+            self.buffer.add((s, p, o))
+            self.buffered += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffered:
+            self.written += len(self.buffer)
+            self.buffer.serialize(self.stream, format='nt')
+            self.buffer = Graph(store=SimpleMemory())
+            self.buffered = 0
+
+    def __len__(self):
+        return self.written + len(self.buffer)
+
+
+class NDJSONWriter(object):
+    """Write JSKOS records to a stream as newline delimited JSON while records are being processed.
+
+    Like NTriplesWriter, this supports the addN() method of Graph. The triples
+    from each call are converted to JSKOS on their own, so records are written
+    as soon as they have been processed. Unlike converting the complete graph,
+    this means that a concept described by more than one record is written as
+    more than one line. The URIs written are tracked to warn about this.
+
+    If orjson is installed, it is used for encoding. Its output has the same
+    content, but uses compact separators and unescaped UTF-8, while the json
+    module writes ", " / ": " separators and \\uXXXX escapes.
+    """
+
+    def __init__(self, stream, context):
+        self.stream = stream
+        self.context = context
+        self.written = 0
+        self.seen = set()
+
+    def addN(self, quads):
+        graph = Graph(store=SimpleMemory())
+        graph.addN((s, p, o, graph) for s, p, o, _ in quads)
+        if len(graph):
+            self.write(json_ld.from_rdf(graph, self.context))
+
+    def write(self, jskos):
+        for record in jskos['@graph'] if '@graph' in jskos else [jskos]:
+            record['@context'] = u'https://gbv.github.io/jskos/context.json'
+            uri = record.get('uri')
+            if uri is not None:
+                if uri in self.seen:
+                    logger.warning('%s is described by more than one record, '
+                                   'writing it to more than one line', uri)
+                else:
+                    self.seen.add(uri)
+            if orjson is not None:
+                self.stream.write(orjson.dumps(record, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE))
+            else:
+                self.stream.write(json.dumps(record, sort_keys=True).encode('utf-8') + b'\n')
+            self.written += 1
+
+    def flush(self):
+        pass
+
+    def __len__(self):
+        return self.written
+
+
+jskos_context = None
+
+
+def load_jskos_context():
+    # The context is only read and parsed once per process
+    global jskos_context
+    if jskos_context is None:
+        s = pkg_resources.resource_string(__name__, 'jskos-context.json').decode('utf-8')
+        jskos_context = json.loads(s)
+    return jskos_context
+
+
+def open_output(filename):
+    if filename and filename != '-':
+        return open(filename, 'wb')
+    if (sys.version_info > (3, 0)):
+        return sys.stdout.buffer
+    return sys.stdout
+
+
+class LazyOutput(object):
+    """File-like object that only opens the output file on the first write.
+
+    Used when writing while the records are processed, so that no empty
+    file is created if none of the records are converted.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.stream = None
+
+    def write(self, data):
+        if self.stream is None:
+            self.stream = open_output(self.filename)
+        return self.stream.write(data)
+
+
 def process_records(records, graph=None, **options):
-    n = 0
     if graph is None:
         graph = Graph()
-    for record in records:
-        n += 1
-        try:
-            process_record(graph, record, **options)
-        except InvalidRecordError as e:
-            record_id = e.control_number or '#%d' % n
-            logger.warning('Ignoring record %s: %s', record_id, e)
 
-    if options.get('expand'):
+    # Inverse relations are added for each record as it is processed, so the
+    # inference only has to run if the graph has other triples to begin with,
+    # like from included files.
+    infer = options.get('expand') and len(graph) != 0
+
+    jobs = options.pop('jobs', None) or 1
+    if jobs > 1:
+        process_records_parallel(records, graph, jobs, **options)
+    else:
+        n = 0
+        for record in records:
+            n += 1
+            try:
+                process_record(graph, record, **options)
+            except InvalidRecordError as e:
+                record_id = e.control_number or '#%d' % n
+                logger.warning('Ignoring record %s: %s', record_id, e)
+
+    if infer:
         logger.info('Expanding RDF via basic SKOS inference')
         skosify.infer.skos_related(graph)
         skosify.infer.skos_topConcept(graph)
@@ -212,7 +451,7 @@ def main():
 
     parser.add_argument('-v', '--verbose', dest='verbose', action='store_true', help='More verbose output')
     parser.add_argument('-o', '--outformat', dest='outformat', metavar='FORMAT', nargs='?',
-                        help='Output format: turtle (default), jskos, or ndjson')
+                        help='Output format: turtle (default), nt, jskos, or ndjson')
 
     parser.add_argument('--include', action='append', dest='include', default=[],
                         help='RDF file(s) to include in the output (e.g. to define a concept scheme). '
@@ -243,6 +482,13 @@ def main():
                         help='Use Skosify to infer skos:hasTopConcept, skos:narrower and skos:related')
     parser.add_argument('--skosify', dest='skosify',
                         help='Run Skosify with given configuration file')
+    parser.add_argument('--stream', dest='stream', action='store_true',
+                        help='With ndjson output, write each record as soon as it has been converted, '
+                             'instead of converting the complete graph at the end. Uses less memory, but a '
+                             'concept described by more than one record gets one line per record. '
+                             'Has no effect together with --include, --expand or --skosify.')
+    parser.add_argument('-j', '--jobs', dest='jobs', type=int, default=1,
+                        help='Number of worker processes to use for converting records (default: 1)')
 
     parser.add_argument('-l', '--list-schemes', dest='list_schemes', action='store_true',
                         help='List default concept schemes.')
@@ -270,7 +516,7 @@ def main():
             print('- %s' % voc)
         return
 
-    supported_formats = ['turtle', 'jskos', 'ndjson']
+    supported_formats = ['turtle', 'nt', 'jskos', 'ndjson']
     if not args.outformat and args.outfile:
         ext = args.outfile.rpartition('.')[-1]
         if ext in supported_formats:
@@ -282,8 +528,8 @@ def main():
 
     graph = Graph()
     for filename in args.include:
-        if args.outformat == 'turtle':
-            graph.load(filename, format='turtle')
+        if args.outformat in ['turtle', 'nt']:
+            graph.load(filename, format=args.outformat)
         else:
             graph.load(filename, format='json-ld')
 
@@ -311,23 +557,39 @@ def main():
         'skip_authority': args.skip_authority,
         'expand': args.expand,
         'skosify': args.skosify,
+        'jobs': args.jobs,
         'vocabularies': vocabularies
     }
 
     marc = MarcFileReader(args.infile)
+
+    streaming = args.outformat == 'nt' or (args.outformat == 'ndjson' and args.stream and not args.include)
+    if streaming and not (args.expand or args.skosify):
+        # N-Triples can be written while the records are processed, since we
+        # don't need the complete graph for sorting or inference. NDJSON only
+        # if asked for (--stream), since each concept is then converted from a
+        # single record, not merged with other records or included files.
+        out_file = LazyOutput(args.outfile)
+        if args.outformat == 'nt':
+            writer = NTriplesWriter(out_file)
+        else:
+            writer = NDJSONWriter(out_file, load_jskos_context())
+        writer.addN((s, p, o, writer) for s, p, o in graph)
+        process_records(marc.records(), writer, **options)
+        writer.flush()
+        if not writer:
+            logger.warning('RDF result is empty!')
+        elif args.outfile and args.outfile != '-':
+            logger.info('Wrote %s: %s' % (args.outformat, args.outfile))
+        return
+
     graph = process_records(marc.records(), graph, **options)
 
     if not graph:
         logger.warning('RDF result is empty!')
         return
 
-    if args.outfile and args.outfile != '-':
-        out_file = open(args.outfile, 'wb')
-    else:
-        if (sys.version_info > (3, 0)):
-            out_file = sys.stdout.buffer
-        else:
-            out_file = sys.stdout
+    out_file = open_output(args.outfile)
 
     if args.outformat == 'turtle':
         # @TODO: Perhaps use OrderedTurtleSerializer if available, but fallback to default Turtle serializer if not?
@@ -337,25 +599,22 @@ def main():
             SKOS.ConceptScheme,
             SKOS.Concept,
         ]
-        serializer.sorters = [
-            (r'/([0-9A-Z\-]+)--([0-9.\-;:]+)/e', lambda x: 'C{}--{}'.format(x[0], x[1])),  # table numbers
-            (r'/([0-9.\-;:]+)/e', lambda x: 'B' + x[0]),  # standard schedule numbers
-            (r'^(.+)$', lambda x: 'A' + x[0]),  # fallback
-        ]
+        serializer.sorters = TURTLE_SORTERS
 
         serializer.serialize(out_file)
 
+    elif args.outformat == 'nt':
+        # Only used with --expand or --skosify, otherwise the triples are
+        # written while the records are processed (see above).
+        graph.serialize(out_file, format='nt')
+
     elif args.outformat in ['jskos', 'ndjson']:
-        s = pkg_resources.resource_string(__name__, 'jskos-context.json').decode('utf-8')
-        context = json.loads(s)
-        jskos = json_ld.from_rdf(graph, context)
+        jskos = json_ld.from_rdf(graph, load_jskos_context())
         if args.outformat == 'jskos':
             jskos['@context'] = u'https://gbv.github.io/jskos/context.json'
             out_file.write(json.dumps(jskos, sort_keys=True, indent=2).encode('utf-8'))
         else:
-            for record in jskos['@graph'] if '@graph' in jskos else [jskos]:
-                record['@context'] = u'https://gbv.github.io/jskos/context.json'
-                out_file.write(json.dumps(record, sort_keys=True).encode('utf-8') + b'\n')
+            NDJSONWriter(out_file, None).write(jskos)
 
     if args.outfile and args.outfile != '-':
         logger.info('Wrote %s: %s' % (args.outformat, args.outfile))
@@ -3,6 +3,8 @@ import logging
 import time
 from lxml import etree
 
+from .element import RECORD
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,10 +18,15 @@ class MarcFileReader:
         logger.info('Parsing: %s', self.name)
         n = 0
         t0 = time.time()
-        record_tag = '{http://www.loc.gov/MARC21/slim}record'
-        for _, record in etree.iterparse(self.name, tag=record_tag):
+        next_report = 500 if logger.isEnabledFor(logging.INFO) else None
+        for _, record in etree.iterparse(self.name, tag=RECORD):
             yield record
             record.clear()
+            # Also remove the cleared records from the parent element, so that
+            # memory usage does not grow with the size of the file.
+            while record.getprevious() is not None:
+                del record.getparent()[0]
             n += 1
-            if n % 500 == 0:
+            if n == next_report:
                 logger.info('Read %d records (%.f recs/sec)', n, (float(n) / (time.time() - t0)))
+                next_report += 500
@@ -7,7 +7,7 @@ from rdflib import URIRef
 from rdflib.namespace import SKOS
 
 from .constants import Constants
-from .element import Element
+from .element import Element, DATAFIELD, SUBFIELD, flatten_text
 from .error import InvalidRecordError, UnknownSchemeError
 from .util import is_uri
 
@@ -26,6 +26,100 @@ class DuplicateFilter(object):
 
 logger.addFilter(DuplicateFilter())
 
+# Fields the control number is taken from, in order of precedence
+CONTROL_NUMBER_PATHS = [
+    'mx:datafield[@tag="016"]/mx:subfield[@code="a"]',
+    'mx:datafield[@tag="010"]/mx:subfield[@code="a"]',
+    'mx:controlfield[@tag="001"]',
+]
+
+# ISO 25964 relations in 7XX $4
+MAPPING_RELATIONS = {
+    '=EQ': SKOS.exactMatch,
+    '~EQ': SKOS.closeMatch,
+    'BM': SKOS.broadMatch,
+    'NM': SKOS.narrowMatch,
+    'RM': SKOS.relatedMatch,
+}
+
+# Thesaurus codes in 7XX second indicator. Value 7 means that the source is specified in $2.
+THESAURUS_CODES = {
+    '0': 'a',  # Library of Congress Subject Headings
+    '1': 'b',  # LC subject headings for children's literature
+    '2': 'c',  # Medical Subject Headings
+    '3': 'd',  # National Agricultural Library subject authority file
+    '4': 'n',  # Source not specified
+    '5': 'k',  # Canadian Subject Headings
+    '6': 'v',  # Répertoire de vedettes-matière
+}
+
+# WebDewey 680 note types whose $t topics are collected, in order of precedence
+WEBDEWEY_TOPIC_NOTES = [
+    ('nvn', 'variantName'),
+    ('nch', 'classHere'),
+    ('nin', 'including'),
+    ('nph', 'formerName'),
+]
+
+# Sets used for membership tests in the per-subfield loops
+HEADING_TAGS = frozenset(['00', '10', '11', '30', '47', '48', '50', '51', '53', '55', '62'])  # Last two digits
+TERM_CODES = frozenset(['a', 'd', 'x', 'y', 'z', 'v'])
+TERM_SEPARATOR_CODES = frozenset(['x', 'y', 'z', 'v'])
+DATE_DELIMITERS = frozenset([',', ';'])
+SEE_ALSO_CODES = frozenset(['0', 'w', '4'])
+PUBLIC_RECORD_TYPES = frozenset([Constants.SCHEDULE_RECORD, Constants.TABLE_RECORD])
+DELETED_RECORD_STATUSES = frozenset(['d', 'o', 's', 'x'])
+
+# Classification record 008/6: Kind of record
+RECORD_TYPES = {
+    'a': Constants.SCHEDULE_RECORD,
+    'b': Constants.TABLE_RECORD,
+    'e': Constants.EXTERNAL_SUMMARY,
+    'i': Constants.INTERNAL_SUMMARY_OF_SCHEDULE_NUMBER,
+    'j': Constants.INTERNAL_SUMMARY_OF_TABLE_NUMBER,
+    'm': Constants.MANUAL_NOTE_RECORD,
+    '1': Constants.SCHEDULE_RECORD,  # @TODO: Find out what this means! It's not documented
+}
+
+# Classification record 008/7: Type of number
+NUMBER_TYPES = {
+    'a': Constants.SINGLE_NUMBER,
+    'b': Constants.NUMBER_SPAN,
+    'c': Constants.SUMMARY_NUMBER_SPAN,
+}
+
+
+# ISO 639-2/B to ISO 639-1 language codes, cached since there are only a few
+# distinct values and the iso639 lookup is relatively slow.
+language_codes = {}
+
+
+def get_language_code(part2b):
+    code = language_codes.get(part2b)
+    if code is None:
+        code = language_codes[part2b] = languages.get(part2b=part2b).part1
+    return code
+
+
+def parse_005(value):
+    # The 005 field is normally 'yyyymmddhhmmss.f', which we can slice directly.
+    # Anything else is left to strptime, which also raises the ValueError.
+    if len(value) == 16 and value[14] == '.' and value[:14].isdigit() and value[15].isdigit():
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                        int(value[8:10]), int(value[10:12]), int(value[12:14]),
+                        int(value[15]) * 100000)
+    return datetime.strptime(value, '%Y%m%d%H%M%S.%f')
+
+
+def parse_008_date(value):
+    # Date entered on file, 'yymmdd'. Two-digit years are interpreted like
+    # strptime's %y: 69-99 is 1969-1999 and 00-68 is 2000-2068.
+    if len(value) == 6 and value.isdigit():
+        year = int(value[0:2])
+        year += 2000 if year < 69 else 1900
+        return datetime(year, int(value[2:4]), int(value[4:6]))
+    return datetime.strptime(value, '%y%m%d')
+
 
 class Record(object):
 
@@ -81,67 +175,71 @@ class Record(object):
         # X53 - Uncontrolled
         # X55 - Genre/Form Term
         # X62 - Medium of Performance Term
-        tags = ['@tag="%s%s"' % (base, tag) for tag in ['00', '10', '11', '30', '47', '48', '50', '51', '53', '55', '62']]
-
+        captions = []
         terms = []
-        for entry in self.record.all('mx:datafield[%s]' % ' or '.join(tags)):
-
-            def reducer(value, element):
-                prefix = ' '
-                suffix = ''
-
-                if value == '':
-                    prefix = ''
-                elif element.get('code') == 'd' and value[-1] not in [',', ';']:
-                    prefix = ' ('
-                    suffix = ')'
-                elif element.get('code') in ['x', 'y', 'z', 'v']:
-                    prefix = '--'
-
-                return value + prefix + element.text() + suffix
-
-            label = entry.reduce(reducer, ['a', 'd', 'x', 'y', 'z', 'v'])
-
-            # codes = ['@code="%s"' % code for code in ['a', 'd', 'x', 'y', 'z', 'v']]
-            # term_parts = entry.text('mx:subfield[%s]' % ' or '.join(codes), True)
-            cn = entry.text('mx:subfield[@code="0"]')
+        for entry in self.record.children(DATAFIELD):
+            tag = entry.get('tag') or ''
+            if tag[:1] != base or tag[1:] not in HEADING_TAGS:
+                continue
+
+            # Build the label and find the control number and ESS codes
+            # in a single pass over the subfields
+            label_parts = []
+            control_numbers = []
+            is_caption = False
+            for sf in entry.node.iterchildren(SUBFIELD):
+                code = sf.get('code')
+                if code in TERM_CODES:
+                    prefix = ' '
+                    suffix = ''
+
+                    if not label_parts:
+                        prefix = ''
+                    elif code == 'd' and label_parts[-1][-1] not in DATE_DELIMITERS:
+                        prefix = ' ('
+                        suffix = ')'
+                    elif code in TERM_SEPARATOR_CODES:
+                        prefix = '--'
+
+                    part = prefix + flatten_text(sf) + suffix
+                    if part:
+                        label_parts.append(part)
+                elif code == '0':
+                    control_numbers.append(flatten_text(sf))
+                elif code == '9' and flatten_text(sf) == 'ess=isCaption':
+                    is_caption = True
+
+            cn = control_numbers[0] if control_numbers else None
             cni = None
             if cn is not None:
-                cn = cn.split(')')
-                if len(cn) == 2:
-                    cn = cn[1]
-                    cni = cn[0].lstrip('(')
-                else:
-                    cn = cn[0]
+                # Split off the organization code in parenthesis, like "(NO-TrBIB)"
+                prefix, sep, rest = cn.partition(')')
+                if sep:
+                    cni = prefix.lstrip('(')
+                    cn = rest
             term = {
-                'value': label,
+                'value': ''.join(label_parts),
                 'node': entry,
                 'control_number': cn,
                 'control_number_identifier': cni,
             }
-            if 'isCaption' in entry.get_ess_codes():
-                terms.insert(0, term)
+            if is_caption:
+                captions.append(term)
             else:
                 terms.append(term)
 
-        return terms
+        # Captions go first, the last one found first
+        captions.reverse()
+        return captions + terms
 
     def parse(self, options):
 
-        # 001
-        self.control_number = self.record.text('mx:controlfield[@tag="001"]')
-
-        # 010 : If present, it takes precedence over 001.
+        # 016, 010 or 001, in that order of precedence, so we can stop at the first one found.
         # <https://github.com/scriptotek/mc2skos/issues/42>
-        value = self.record.text('mx:datafield[@tag="010"]/mx:subfield[@code="a"]')
-        if value is not None:
-            self.control_number = value
-
-        # 016 : If present, it takes precedence over 001
-        # <https://github.com/scriptotek/mc2skos/issues/42>
-        value = self.record.text('mx:datafield[@tag="016"]/mx:subfield[@code="a"]')
-        if value is not None:
-            self.control_number = value
+        for path in CONTROL_NUMBER_PATHS:
+            self.control_number = self.record.text(path)
+            if self.control_number is not None:
+                break
 
         # 003
         self.control_number_identifier = self.record.text('mx:controlfield[@tag="003"]')
@@ -150,13 +248,21 @@ class Record(object):
         value = self.record.text('mx:controlfield[@tag="005"]')
         if value is not None:
             try:
-                self.modified = datetime.strptime(value, '%Y%m%d%H%M%S.%f')
+                self.modified = parse_005(value)
             except ValueError:
                 logger.warning('Record %s: Ignoring invalid date in 005 field: %s', self.control_number, value)
 
         # 040: Record Source
         lang = self.record.text('mx:datafield[@tag="040"]/mx:subfield[@code="b"]') or 'eng'
-        self.lang = languages.get(part2b=lang).part1
+        self.lang = get_language_code(lang)
+
+    def parse_datafields(self, handlers):
+        # Read all the data fields in a single pass over the record, passing each
+        # field to the handler for its tag, if any.
+        for entry in self.record.children(DATAFIELD):
+            handler = handlers.get(entry.get('tag'))
+            if handler is not None:
+                handler(entry)
 
     def is_public(self):
         return True
@@ -195,46 +301,42 @@ class Record(object):
                 }
 
         for heading in self.get_terms('7'):
+            node = heading['node']
+            tag = node.get('tag')
+            ind2 = node.get('ind2')
             relation = None
-            for sf in heading['node'].all('mx:subfield'):
-                if sf.get('code') == '4':
-                    if is_uri(sf.text()):
-                        relation = URIRef(sf.text())
+            for sf in node.node.iterchildren(SUBFIELD):
+                code = sf.get('code')
+                if code == '4':
+                    value = flatten_text(sf)
+                    if is_uri(value):
+                        relation = URIRef(value)
                     else:
-                        relation = {
-                            '=EQ': SKOS.exactMatch,
-                            '~EQ': SKOS.closeMatch,
-                            'BM': SKOS.broadMatch,
-                            'NM': SKOS.narrowMatch,
-                            'RM': SKOS.relatedMatch,
-                        }.get(sf.text())  # None if no match
-
-                elif sf.get('code') == '0' or sf.get('code') == '1':
+                        relation = MAPPING_RELATIONS.get(value)  # None if no match
+
+                elif code == '0' or code == '1':
+                    value = flatten_text(sf)
+
                     # Note: Default value might change in the future
                     relation = relation if relation else SKOS.closeMatch
 
-                    if is_uri(sf.text()):
+                    if is_uri(value):
                         self.relations.append({
-                            'uri': sf.text(),
+                            'uri': value,
                             'relation': relation,
                         })
                     else:
-                        scheme_code = {
-                            '0': 'a',  # Library of Congress Subject Headings
-                            '1': 'b',  # LC subject headings for children's literature
-                            '2': 'c',  # Medical Subject Headings
-                            '3': 'd',  # National Agricultural Library subject authority file
-                            '4': 'n',  # Source not specified
-                            '5': 'k',  # Canadian Subject Headings
-                            '6': 'v',  # Répertoire de vedettes-matière
-                            '7': heading['node'].text('mx:subfield[@code="2"]'),  # Source specified in subfield $2
-                        }.get(heading['node'].get('ind2'))
+                        if ind2 == '7':
+                            # Source specified in subfield $2
+                            scheme_code = node.text('mx:subfield[@code="2"]')
+                        else:
+                            scheme_code = THESAURUS_CODES.get(ind2)
 
                         yield {
                             'scheme_code': scheme_code,
                             'relation': relation,
-                            'control_number': sf.text(),
-                            'tag': heading['node'].get('tag'),
+                            'control_number': value,
+                            'tag': tag,
                         }
 
 
@@ -242,6 +344,7 @@ class ClassificationRecord(Record):
 
     def __init__(self, record, options=None):
         options = options or {}
+        self.public = None  # Set by is_public(), which may already be called by parse()
 
         super(ClassificationRecord, self).__init__(record, options)
 
@@ -294,6 +397,45 @@ class ClassificationRecord(Record):
                     'relation': SKOS.broader
                 })
 
+        # Records that are going to be skipped anyway don't need the notes
+        # and index terms parsed.
+        if options.get('public_only') and not self.is_public():
+            return
+
+        # Read the notes in a single pass over the data fields. The 765 fields
+        # are collected on the way, since they are processed last field first.
+        synthesized_number_fields = []
+        self.parse_datafields({
+            '253': self.parse_editorial_note,  # Constants.COMPLEX_SEE_REFERENCE
+            '353': self.parse_editorial_note,  # Constants.COMPLEX_SEE_ALSO_REFERENCE
+            '680': self.parse_scope_note,
+            '683': self.parse_editorial_note,  # Constants.APPLICATION_INSTRUCTION_NOTE
+            '684': self.parse_editorial_note,  # Constants.AUXILIARY_INSTRUCTION_NOTE
+            '685': self.parse_history_note,
+            '694': self.parse_editorial_note,
+            '765': synthesized_number_fields.append,
+        })
+
+        # 7XX Index terms
+        for heading in self.get_terms('7'):
+            self.altLabel.append({
+                'term': heading['value']
+            })
+
+        # 7XX: Heading Linking Entries
+        for mapping in self.get_mappings():
+            self.append_relation(
+                mapping['scheme_code'],
+                None,
+                mapping['relation'],
+                control_number=mapping['control_number'],
+                tag=mapping['tag']
+            )
+
+        for entry in reversed(synthesized_number_fields):
+            self.parse_synthesized_number_components(entry)
+
+    def parse_editorial_note(self, entry):
         # 253 : Complex See Reference (R)
         # Example:
         # <mx:datafield tag="253" ind1="2" ind2=" ">
@@ -304,9 +446,6 @@ class ClassificationRecord(Record):
         #   <mx:subfield code="9">ess=nce</mx:subfield>
         # </mx:datafield>
         #
-        for entry in self.record.all('mx:datafield[@tag="253"]'):
-            self.editorialNote.append(entry.stringify())  # Constants.COMPLEX_SEE_REFERENCE
-
         # 353 : Complex See Also Reference (R)
         # Example:
         # <mx:datafield tag="353" ind1=" " ind2=" ">
@@ -316,9 +455,29 @@ class ClassificationRecord(Record):
         #   <mx:subfield code="t">bred beskrivelse av situasjon og vilkår for intellektuell virksomhet</mx:subfield>
         #   <mx:subfield code="9">ess=nsa</mx:subfield>
         # </mx:datafield>
-        for entry in self.record.all('mx:datafield[@tag="353"]'):
-            self.editorialNote.append(entry.stringify())  # Constants.COMPLEX_SEE_ALSO_REFERENCE
+        #
+        # 683 : Application Instruction Note
+        # Example:
+        # <mx:datafield tag="683" ind1="1" ind2=" ">
+        #   <mx:subfield code="i">Ordnes alfabetisk etter</mx:subfield>
+        #   <mx:subfield code="t">navnet på datamaskinen eller prosessoren</mx:subfield>
+        #   <mx:subfield code="i">, f.eks.</mx:subfield>
+        #   <mx:subfield code="t">IBM System z9®</mx:subfield>
+        #   <mx:subfield code="9">ess=nal</mx:subfield>
+        # </mx:datafield>
+        #
+        # 684 : Auxiliary Instruction Note
+        # 694 : ??? Note : Non-standard code for 684 'Auxiliary Instruction Note' ??
+        # Example:
+        #   <mx:datafield tag="694" ind2=" " ind1=" ">
+        #     <mx:subfield code="i">De fleste verker om seletøy og tilbehør klassifiseres med hester i</mx:subfield>
+        #     <mx:subfield code="a">636.10837</mx:subfield>
+        #     <mx:subfield code="9">ess=nml</mx:subfield>
+        #   </mx:datafield>
+        #
+        self.editorialNote.append(entry.stringify())
 
+    def parse_scope_note(self, entry):
         # 680 : Scope note
         # Example:
         # <mx:datafield tag="680" ind1="1" ind2=" ">
@@ -333,36 +492,32 @@ class ClassificationRecord(Record):
         #   <mx:subfield code="9">ess=nch</mx:subfield>
         # </mx:datafield>
         #
-        for entry in self.record.all('mx:datafield[@tag="680"]'):
-            ess = entry.get_ess_codes()
-            if 'ndf' in ess:
-                self.definition.append(entry.stringify())  # Constants.DEFINITION
-            else:
-                self.scopeNote.append(entry.stringify())  # Constants.SCOPE_NOTE
-                topics = [t.capitalize() for t in entry.text('mx:subfield[@code="t"]', True)]
-                for topic in topics:
-                    if 'nvn' in ess:
-                        self.webDeweyExtras['variantName'] = self.webDeweyExtras.get('variantName', []) + [topic]
-                    elif 'nch' in ess:
-                        self.webDeweyExtras['classHere'] = self.webDeweyExtras.get('classHere', []) + [topic]
-                    elif 'nin' in ess:
-                        self.webDeweyExtras['including'] = self.webDeweyExtras.get('including', []) + [topic]
-                    elif 'nph' in ess:
-                        self.webDeweyExtras['formerName'] = self.webDeweyExtras.get('formerName', []) + [topic]
-
-        # 683 : Application Instruction Note
-        # Example:
-        # <mx:datafield tag="683" ind1="1" ind2=" ">
-        #   <mx:subfield code="i">Ordnes alfabetisk etter</mx:subfield>
-        #   <mx:subfield code="t">navnet på datamaskinen eller prosessoren</mx:subfield>
-        #   <mx:subfield code="i">, f.eks.</mx:subfield>
-        #   <mx:subfield code="t">IBM System z9®</mx:subfield>
-        #   <mx:subfield code="9">ess=nal</mx:subfield>
-        # </mx:datafield>
-        #
-        for entry in self.record.all('mx:datafield[@tag="683"]'):
-            self.editorialNote.append(entry.stringify())  # Constants.APPLICATION_INSTRUCTION_NOTE
-
+        # Collect the ESS codes and topics in the same pass as the subfields
+        # are fetched for the note text.
+        subfields = []
+        ess = []
+        topics = []
+        for sf in entry.node.iterchildren(SUBFIELD):
+            subfields.append(sf)
+            code = sf.get('code')
+            if code == '9':
+                value = sf.text
+                if value is not None and value.startswith('ess='):
+                    ess.append(value[4:])
+            elif code == 't' and sf.text is not None:
+                topics.append(flatten_text(sf).capitalize())
+
+        if 'ndf' in ess:
+            self.definition.append(entry.stringify(nodes=subfields))  # Constants.DEFINITION
+        else:
+            self.scopeNote.append(entry.stringify(nodes=subfields))  # Constants.SCOPE_NOTE
+            if topics:
+                for ess_code, key in WEBDEWEY_TOPIC_NOTES:
+                    if ess_code in ess:
+                        self.webDeweyExtras.setdefault(key, []).extend(topics)
+                        break
+
+    def parse_history_note(self, entry):
         # 685 : History note
         # Example:
         #  <mx:datafield tag="685" ind2="0" ind1="1">
@@ -372,67 +527,41 @@ class ClassificationRecord(Record):
         #    <mx:subfield code="9">ess=nrl</mx:subfield>
         #  </mx:datafield>
         #
-        for entry in self.record.all('mx:datafield[@tag="685"]'):
-            self.historyNote.append(entry.stringify())  # Constants.HISTORY_NOTE
-
-        # 684 : Auxiliary Instruction Note
-        # 694 : ??? Note : Non-standard code for 684 'Auxiliary Instruction Note' ??
-        # Example:
-        #   <mx:datafield tag="694" ind2=" " ind1=" ">
-        #     <mx:subfield code="i">De fleste verker om seletøy og tilbehør klassifiseres med hester i</mx:subfield>
-        #     <mx:subfield code="a">636.10837</mx:subfield>
-        #     <mx:subfield code="9">ess=nml</mx:subfield>
-        #   </mx:datafield>
-        #
-        for entry in self.record.all('mx:datafield[@tag="684" or @tag="694"]'):
-            self.editorialNote.append(entry.stringify())
-
-        # 7XX Index terms
-        for heading in self.get_terms('7'):
-            self.altLabel.append({
-                'term': heading['value']
-            })
-
-        # 7XX: Heading Linking Entries
-        for mapping in self.get_mappings():
-            self.append_relation(
-                mapping['scheme_code'],
-                None,
-                mapping['relation'],
-                control_number=mapping['control_number'],
-                tag=mapping['tag']
-            )
+        self.historyNote.append(entry.stringify())  # Constants.HISTORY_NOTE
 
+    def parse_synthesized_number_components(self, entry):
         # 765 : Synthesized Number Components
-        for entry in reversed(list(self.record.all('mx:datafield[@tag="765"]'))):
-
-            if entry.text('mx:subfield[@code="u"]') is None:
-                logger.debug('Built number without components specified: %s', self.notation)
-
-            table = ''
-            rootno = ''
-            for sf in entry.all('mx:subfield'):
-                if sf.get('code') == 'b':    # Base number
-                    if len(self.components) == 0:
-                        self.components.append(table + sf.text())
-                        table = ''
-                elif sf.get('code') == 'r':    # Root number
-                    rootno = sf.text()
-                elif sf.get('code') == 'z':    # Table identification
-                    table = '{0}--'.format(sf.text())
-                # elif sf.get('code') == 't':    # Digits added from internal subarrangement or add table
-                #     self.components.append(sf.text())
-                elif sf.get('code') == 's':  # Digits added from classification number in schedule or external table
-                    if sf.text() is None:
-                        logger.warning('Class %s has blank 765 $s subfield. This should be fixed.', self.notation)
-                    else:
-                        tmp = rootno + sf.text()
-                        if len(tmp) > 3:
-                            tmp = tmp[:3] + '.' + tmp[3:]
-                        self.components.append(table + tmp)
-                        table = ''
-                # elif sf.get('code') not in ['9', 'u']:
-                #     print sf.get('code'), sf.text, class_no
+        table = ''
+        rootno = ''
+        has_components = False
+        for sf in entry.node.iterchildren(SUBFIELD):
+            code = sf.get('code')
+            if code == 'u':    # Number components, checked in the same pass
+                has_components = True
+            elif code == 'b':    # Base number
+                if len(self.components) == 0:
+                    self.components.append(table + flatten_text(sf))
+                    table = ''
+            elif code == 'r':    # Root number
+                rootno = flatten_text(sf)
+            elif code == 'z':    # Table identification
+                table = '%s--' % flatten_text(sf)
+            # elif code == 't':    # Digits added from internal subarrangement or add table
+            #     self.components.append(flatten_text(sf))
+            elif code == 's':  # Digits added from classification number in schedule or external table
+                if flatten_text(sf) is None:
+                    logger.warning('Class %s has blank 765 $s subfield. This should be fixed.', self.notation)
+                else:
+                    tmp = rootno + flatten_text(sf)
+                    if len(tmp) > 3:
+                        tmp = tmp[:3] + '.' + tmp[3:]
+                    self.components.append(table + tmp)
+                    table = ''
+            # elif sf.get('code') not in ['9', 'u']:
+            #     print sf.get('code'), sf.text, class_no
+
+        if not has_components:
+            logger.debug('Built number without components specified: %s', self.notation)
 
     @staticmethod
     def parse_008(value):
@@ -441,34 +570,14 @@ class ClassificationRecord(Record):
         if value is None:
             return None, None, None, True, False, False
 
-        created = datetime.strptime(value[:6], '%y%m%d')
-
-        if value[6] == 'a':
-            record_type = Constants.SCHEDULE_RECORD
-        elif value[6] == 'b':
-            record_type = Constants.TABLE_RECORD
-        elif value[6] == 'e':
-            record_type = Constants.EXTERNAL_SUMMARY
-        elif value[6] == 'i':
-            record_type = Constants.INTERNAL_SUMMARY_OF_SCHEDULE_NUMBER
-        elif value[6] == 'j':
-            record_type = Constants.INTERNAL_SUMMARY_OF_TABLE_NUMBER
-        elif value[6] == 'm':
-            record_type = Constants.MANUAL_NOTE_RECORD
-        elif value[6] == '1':  # @TODO: Find out what this means! It's not documented
-            record_type = Constants.SCHEDULE_RECORD
-        else:
+        created = parse_008_date(value[:6])
+
+        record_type = RECORD_TYPES.get(value[6])
+        if record_type is None:
             logger.warning('Unknown value in 008/6: %s', value[6])
             record_type = Constants.UNKNOWN
 
-        if value[7] == 'a':
-            number_type = Constants.SINGLE_NUMBER
-        elif value[7] == 'b':
-            number_type = Constants.NUMBER_SPAN
-        elif value[7] == 'c':
-            number_type = Constants.SUMMARY_NUMBER_SPAN
-        else:
-            number_type = Constants.UNKNOWN
+        number_type = NUMBER_TYPES.get(value[7], Constants.UNKNOWN)
 
         deprecated = False
         if value[8] == 'd' or value[8] == 'e':
@@ -508,23 +617,20 @@ class ClassificationRecord(Record):
         add_table = None
         notation = None
         parent_notation = None
-        buf = ''
         caption = None  # Note: Synthesized classes do not have captions, that's ok
-        zbuf = ''
         is_top_concept = True
-        parts = []
-
-        buf = [{'code': sf.get('code'), 'value': sf.text()} for sf in element.all('mx:subfield')]
 
         mode = 'notation'
-        for idx, subfield in enumerate(buf):
-            if subfield['code'] == 'z':
-                table = subfield['value']
+        for sf in element.node.iterchildren(SUBFIELD):
+            code = sf.get('code')
+            value = flatten_text(sf)
+            if code == 'z':
+                table = value
 
-            elif subfield['code'] == 'y':
-                add_table = subfield['value']
+            elif code == 'y':
+                add_table = value
 
-            elif subfield['code'] == 'a' and mode == 'notation':
+            elif code == 'a' and mode == 'notation':
                 if add_table == '1':
                     notation += ':'
                 elif add_table is not None:
@@ -533,13 +639,13 @@ class ClassificationRecord(Record):
                     notation = '%s--' % table
                 else:
                     notation = ''
-                notation += subfield['value']
+                notation += value
                 add_table = None
 
-            elif subfield['code'] == 'c' and mode == 'notation':
-                notation += '-' + subfield['value']
+            elif code == 'c' and mode == 'notation':
+                notation += '-' + value
 
-            elif subfield['code'] == 'e' and mode in ['notation', 'parent']:
+            elif code == 'e' and mode != 'other':
                 parent_notation = ''
                 if add_table == '1':
                     parent_notation += ':'
@@ -547,17 +653,17 @@ class ClassificationRecord(Record):
                     parent_notation += ';%s:' % add_table
                 elif table is not None:
                     parent_notation = '%s--' % table
-                parent_notation += subfield['value']
+                parent_notation += value
                 add_table = None
                 mode = 'parent'
 
-            elif subfield['code'] == 'f' and mode == 'parent':
-                parent_notation += '-' + subfield['value']
+            elif code == 'f' and mode == 'parent':
+                parent_notation += '-' + value
 
-            elif subfield['code'] == 'j':
-                caption = subfield['value']
+            elif code == 'j':
+                caption = value
 
-            elif subfield['code'] == 'h':
+            elif code == 'h':
                 # In the ddc21 examples, the parent class numbers (153 $e, $f) are not included,
                 # but the parent class headings are (153 $h). We do not make any attempt of mapping
                 # the headings to the classes, but just take note that this is not a top concept.
@@ -572,6 +678,12 @@ class ClassificationRecord(Record):
         return table, notation, is_top_concept, parent_notation, caption
 
     def is_public(self):
+        # Only checked once, since parse() may already have needed it (public_only)
+        if self.public is None:
+            self.public = self.check_public()
+        return self.public
+
+    def check_public(self):
         if not self.display:
             # This is a record not displayed in standard schedules or tables
             # or in extended display. It could be a deleted (not deprecated)
@@ -579,7 +691,7 @@ class ClassificationRecord(Record):
             logger.debug('%s is not intended for display', self.notation)
             return False
 
-        if self.record_type not in [Constants.SCHEDULE_RECORD, Constants.TABLE_RECORD]:
+        if self.record_type not in PUBLIC_RECORD_TYPES:
             logger.debug('%s is a type %s', self.notation, self.record_type)
             return False
 
@@ -623,13 +735,13 @@ class AuthorityRecord(Record):
         self.generate_uris()
 
         leader = self.record.text('mx:leader')
-        if leader[5] in ['d', 'o', 's', 'x']:
+        if leader[5] in DELETED_RECORD_STATUSES:
             self.deprecated = True
 
         # 008
         field_008 = self.record.text('mx:controlfield[@tag="008"]')
         if field_008:
-            self.created = datetime.strptime(field_008[:6], '%y%m%d')
+            self.created = parse_008_date(field_008[:6])
 
         # 065: Other Classification Number
         el = self.record.first('mx:datafield[@tag="065"]')
@@ -678,84 +790,101 @@ class AuthorityRecord(Record):
 
         # 5XX: See Also From Tracings
         for heading in self.get_terms('5'):
-            local_id = heading['node'].text('mx:subfield[@code="0"]')
+            # Collect the first $0, $w and $4 in a single pass over the subfields
+            values = {}
+            for sf in heading['node'].node.iterchildren(SUBFIELD):
+                if sf.get('code') in SEE_ALSO_CODES:
+                    values.setdefault(sf.get('code'), flatten_text(sf))
+
+            local_id = values.get('0')
             if local_id:
-                if local_id:
-                    sf_w = heading['node'].text('mx:subfield[@code="w"]')
-                    sf_4 = heading['node'].text('mx:subfield[@code="4"]')
-
-                    if sf_w == 'g':
-                        relation = SKOS.broader
-                    elif sf_w == 'h':
-                        relation = SKOS.narrower
-                    elif sf_w == 'r' and sf_4 is not None and is_uri(sf_4):
-                        relation = URIRef(sf_4)
-                    else:
-                        relation = SKOS.related
+                sf_w = values.get('w')
+                sf_4 = values.get('4')
+
+                if sf_w == 'g':
+                    relation = SKOS.broader
+                elif sf_w == 'h':
+                    relation = SKOS.narrower
+                elif sf_w == 'r' and sf_4 is not None and is_uri(sf_4):
+                    relation = URIRef(sf_4)
+                else:
+                    relation = SKOS.related
 
-                    if is_uri(local_id):
-                        self.relations.append({
-                            'uri': local_id,
-                            'relation': relation,
-                        })
-                    else:
-                        self.append_relation(
-                            self.scheme.code,
-                            self.scheme.type,
-                            relation,
-                            control_number=local_id,
-                            tag=heading['node'].get('tag')
-                        )
+                if is_uri(local_id):
+                    self.relations.append({
+                        'uri': local_id,
+                        'relation': relation,
+                    })
+                else:
+                    self.append_relation(
+                        self.scheme.code,
+                        self.scheme.type,
+                        relation,
+                        control_number=local_id,
+                        tag=heading['node'].get('tag')
+                    )
+
+        # Read the notes in a single pass over the data fields
+        self.parse_datafields({
+            '667': self.parse_nonpublic_general_note,
+            '670': self.parse_source_data_found,
+            '677': self.parse_definition,
+            '678': self.parse_biographical_or_historical_data,
+            '680': self.parse_public_general_note,
+            '681': self.parse_subject_example_tracing_note,
+            '682': self.parse_deleted_heading_information,
+            '688': self.parse_application_history_note,
+        })
 
+        # 7XX: Heading Linking Entries
+        for mapping in self.get_mappings():
+            self.append_relation(
+                mapping['scheme_code'],
+                None,
+                mapping['relation'],
+                control_number=mapping['control_number'],
+                tag=mapping['tag']
+            )
+
+    def parse_nonpublic_general_note(self, entry):
         # 667 : Nonpublic General Note
         # madsrdf:editorialNote
-        for entry in self.record.all('mx:datafield[@tag="667"]'):
-            self.editorialNote.append(entry.stringify(subfields=['a']))
+        self.editorialNote.append(entry.stringify(subfields=['a']))
 
+    def parse_source_data_found(self, entry):
         # 670 : Source Data Found
         # Citation for a consulted source in which information is found related in some
         # manner to the entity represented by the authority record or related entities.
-        for entry in self.record.all('mx:datafield[@tag="670"]'):
-            self.note.append('Source: ' + entry.stringify(subfields=['a']))
+        self.note.append('Source: ' + entry.stringify(subfields=['a']))
 
+    def parse_definition(self, entry):
         # 677 : Definition
-        for entry in self.record.all('mx:datafield[@tag="677"]'):
-            self.definition.append(entry.stringify(subfields=['a']))
+        self.definition.append(entry.stringify(subfields=['a']))
 
+    def parse_biographical_or_historical_data(self, entry):
         # 678 : Biographical or Historical Data
         # Summary of the essential biographical, historical, or other information about the 1XX heading
         # madsrdf:note
-        for entry in self.record.all('mx:datafield[@tag="678"]'):
-            self.note.append(entry.stringify(subfields=['a', 'b']))
+        self.note.append(entry.stringify(subfields=['a', 'b']))
 
+    def parse_public_general_note(self, entry):
         # 680 : Public General Note
         # madsrdf:note
-        for entry in self.record.all('mx:datafield[@tag="680"]'):
-            self.note.append(entry.stringify(subfields=['a', 'i']))
+        self.note.append(entry.stringify(subfields=['a', 'i']))
 
+    def parse_subject_example_tracing_note(self, entry):
         # 681 : Subject Example Tracing Note
         # madsrdf:exampleNote
-        for entry in self.record.all('mx:datafield[@tag="681"]'):
-            self.example.append(entry.stringify(subfields=['a', 'i']))
+        self.example.append(entry.stringify(subfields=['a', 'i']))
 
+    def parse_deleted_heading_information(self, entry):
         # 682 : Deleted Heading Information
         # Explanation for the deletion of an established heading or subdivision record from an authority file.
         # madsrdf:changeNote
-        for entry in self.record.all('mx:datafield[@tag="682"]'):
-            self.changeNote.append(entry.stringify(subfields=['a', 'i']))
+        self.changeNote.append(entry.stringify(subfields=['a', 'i']))
 
+    def parse_application_history_note(self, entry):
         # 688 : Application History Note
         # Information that documents changes in the application of a 1XX heading.
         # madsrdf:historyNote
-        for entry in self.record.all('mx:datafield[@tag="688"]'):
-            self.historyNote.append(entry.stringify(subfields=['a']))
-
-        # 7XX: Heading Linking Entries
-        for mapping in self.get_mappings():
-            self.append_relation(
-                mapping['scheme_code'],
-                None,
-                mapping['relation'],
-                control_number=mapping['control_number'],
-                tag=mapping['tag']
-            )
+        self.historyNote.append(entry.stringify(subfields=['a']))
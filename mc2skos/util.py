@@ -1,5 +1,8 @@
+URI_PREFIXES = ('http://', 'https://')
+
+
 def is_uri(value):
-    return value.startswith('http://') or value.startswith('https://')
+    return value.startswith(URI_PREFIXES)
 
 
 def is_str(obj):
@@ -5,6 +5,40 @@ from .error import UnknownSchemeError
 from .record import AuthorityRecord, ClassificationRecord
 from .util import is_str
 
+# Regular expressions used when generating URIs, compiled once
+NON_DIGITS = re.compile('[^0-9]')
+ORGANIZATION_PREFIX = re.compile(r'^\(.+\)(.+)$')
+TEMPLATE_FIELD = re.compile(r'\{(?P<param>[a-z_]+)(?:\[(?P<start>\d+)?:(?P<end>\d+)?\])?(?P<formatter>[:!][^\}]+)?\}')
+
+
+def compile_template(uri_template):
+    # Split a URI template into literal strings and (param, start, end, formatter,
+    # conversion) tuples, so the template only has to be parsed once per scheme.
+    # Also returns whether the literal strings contain anything left for
+    # str.format (other fields or escaped braces).
+    parts = []
+    needs_format = False
+    pos = 0
+    for match in TEMPLATE_FIELD.finditer(uri_template):
+        literal = uri_template[pos:match.start()]
+        needs_format = needs_format or '{' in literal or '}' in literal
+        parts.append(literal)
+        start = int(match.group('start')) if match.group('start') else None
+        end = int(match.group('end')) if match.group('end') else None
+        formatter_str = '{0' + match.group('formatter') + '}' if match.group('formatter') else None
+        if formatter_str is not None and 'd' in formatter_str:
+            conversion = int
+        elif formatter_str is not None and 'f' in formatter_str:
+            conversion = float
+        else:
+            conversion = None
+        parts.append((match.group('param'), start, end, formatter_str, conversion))
+        pos = match.end()
+    literal = uri_template[pos:]
+    needs_format = needs_format or '{' in literal or '}' in literal
+    parts.append(literal)
+    return parts, needs_format
+
 
 @python_2_unicode_compatible
 class Vocabularies(object):
@@ -49,14 +83,15 @@ class Vocabularies(object):
     def get(self, scheme_code, edition=None):
         if scheme_code == 'n':
             raise UnknownSchemeError()
-        if scheme_code not in self.entries:
+        scheme = self.entries.get(scheme_code)
+        if scheme is None:
             raise UnknownSchemeError(scheme_code)
-        scheme = self.entries[scheme_code]
         if edition is not None:
             key = '%s-%s' % (scheme_code, edition)
-            if key not in self.entries:
-                self.entries[key] = scheme.with_edition(edition)
-            return self.entries[key]
+            scheme_edition = self.entries.get(key)
+            if scheme_edition is None:
+                scheme_edition = self.entries[key] = scheme.with_edition(edition)
+            return scheme_edition
         return scheme
 
     def get_from_record(self, record):
@@ -75,10 +110,12 @@ class Vocabularies(object):
                     return self.get(code)
 
         if isinstance(record, ClassificationRecord):
-            code = record.record.text('mx:datafield[@tag="084"]/mx:subfield[@code="a"]')
-            edition = record.record.text('mx:datafield[@tag="084"]/mx:subfield[@code="c"]')
-            if code:
-                return self.get(code, edition=edition)
+            field_084 = record.record.first('mx:datafield[@tag="084"]')
+            if field_084 is not None:
+                code = field_084.text('mx:subfield[@code="a"]')
+                edition = field_084.text('mx:subfield[@code="c"]')
+                if code:
+                    return self.get(code, edition=edition)
 
         raise UnknownSchemeError()
 
@@ -92,12 +129,17 @@ class ConceptScheme(object):
         self.code = code  # Can be None if URI template is specified in options
         self.edition = edition
         self.options = options
-        self.edition_numeric = re.sub('[^0-9]', '', edition or '')
+        self.edition_numeric = NON_DIGITS.sub('', edition or '')
 
         self.uri_templates = {
             'concept': options.get('concept') or options.get('base_uri'),
             'scheme': options.get('scheme') or options.get('base_uri'),
         }
+        self.compiled_templates = {
+            uri_type: compile_template(uri_template)
+            for uri_type, uri_template in self.uri_templates.items()
+            if uri_template is not None
+        }
 
         self.whitespace = options.get('whitespace') or '-'
 
@@ -127,34 +169,29 @@ class ConceptScheme(object):
 
         if kwargs.get('control_number') is not None:
             # Remove organization prefix in parenthesis:
-            kwargs['control_number'] = re.sub(r'^\(.+\)(.+)$', '\\1', kwargs['control_number'])
+            kwargs['control_number'] = ORGANIZATION_PREFIX.sub('\\1', kwargs['control_number'])
 
         # Process field[start:end]
-
-        def process_formatter(matches):
-            start = int(matches.group('start')) if matches.group('start') else None
-            end = int(matches.group('end')) if matches.group('end') else None
-            value = kwargs[matches.group('param')][start:end]
-            if len(value) == 0:
+        template_parts, needs_format = self.compiled_templates[uri_type]
+        parts = []
+        for part in template_parts:
+            if not isinstance(part, tuple):
+                parts.append(part)
+                continue
+            param, start, end, formatter_str, conversion = part
+            value = kwargs[param][start:end]
+            if len(value) == 0 or formatter_str is None:
                 # Empty string can be used for the scheme URI.
                 # Trying to convert this to decimal or float will fail!
-                formatter_str = '{0}'
+                parts.append(value)
+            elif conversion is None:
+                parts.append(formatter_str.format(value))
             else:
-                formatter_str = '{0' + matches.group('formatter') + '}' if matches.group('formatter') else '{0}'
-                if 'd' in formatter_str:
-                    value = int(value)
-                elif 'f' in formatter_str:
-                    value = float(value)
-
-            return formatter_str.format(value)
-
-        uri_template = re.sub(
-            r'\{(?P<param>[a-z_]+)(?:\[(?P<start>\d+)?:(?P<end>\d+)?\])?(?P<formatter>[:!][^\}]+)?\}',
-            process_formatter,
-            uri_template
-        )
+                parts.append(formatter_str.format(conversion(value)))
+        uri = ''.join(parts)
 
-        uri = uri_template.format(**kwargs)
+        if needs_format:
+            uri = uri.format(**kwargs)
 
         # replace whitespaces in URI
         return uri.replace(' ', self.whitespace)
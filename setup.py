@@ -38,6 +38,7 @@ setup(name='mc2skos',
                         'future',
                         'skosify>=2.0.1'
                         ],
+      extras_require={'orjson': ['orjson']},
       setup_requires=['rdflib', 'pytest-runner>=2.9'],
       tests_require=['pytest', 'pytest-pep8', 'pytest-cov'],
       packages=['mc2skos'],
@@ -4,13 +4,19 @@ import pytest
 import os
 import sys
 import glob
+import itertools
 import re
+import json
+import skosify
+from io import BytesIO
 from lxml import etree
+import mc2skos.mc2skos
 from mc2skos.reader import MarcFileReader
-from mc2skos.mc2skos import process_records
+from mc2skos.mc2skos import process_records, NTriplesWriter, NDJSONWriter, load_jskos_context
 from mc2skos.vocabularies import Vocabularies
 from rdflib.namespace import RDF, SKOS, OWL, DCTERMS, Namespace
 from rdflib import URIRef, Literal, Graph
+from rdflib.compare import isomorphic
 
 
 with open('mc2skos/vocabularies.yml') as fp:
@@ -117,5 +123,111 @@ def test_authority_example(marc, match):
     check_processing(marc, expect, include_altlabels=True)
     vocabularies.set_default_scheme()
 
+
+def test_parallel_processing():
+    marc = MarcFileReader('examples/ddc21en-003.52.xml')
+    expect = process_records(marc.records(), vocabularies=vocabularies, include_altlabels=True)
+    graph = process_records(marc.records(), vocabularies=vocabularies, include_altlabels=True, jobs=2)
+
+    assert len(graph) > 0
+    assert isomorphic(graph, expect)
+
+    # A second conversion in the same process should use its own options
+    expect = process_records(marc.records(), vocabularies=vocabularies)
+    graph = process_records(marc.records(), vocabularies=vocabularies, jobs=2)
+    assert isomorphic(graph, expect)
+    assert not any(graph.triples((None, SKOS.altLabel, None)))
+
+
+def test_ntriples_writer():
+    marc = MarcFileReader('examples/ddc21en-003.52.xml')
+    expect = process_records(marc.records(), vocabularies=vocabularies, include_altlabels=True)
+
+    stream = BytesIO()
+    writer = NTriplesWriter(stream, buffer_size=10)
+    process_records(marc.records(), writer, vocabularies=vocabularies, include_altlabels=True)
+    writer.flush()
+
+    graph = Graph()
+    graph.parse(data=stream.getvalue().decode('ascii'), format='nt')
+    assert len(writer) == len(expect)
+    assert isomorphic(graph, expect)
+
+
+def test_ntriples_writer_len():
+    triple = (URIRef('http://example.org/a'), SKOS.prefLabel, Literal('a'))
+
+    writer = NTriplesWriter(BytesIO())
+    writer.addN([triple + (writer,), triple + (writer,)])
+    assert len(writer) == 1
+    writer.flush()
+    assert len(writer) == 1
+
+
+def test_ndjson_writer():
+    marc = MarcFileReader('examples/ddc23no-001.xml')
+    expect = process_records(marc.records(), vocabularies=vocabularies)
+
+    stream = BytesIO()
+    writer = NDJSONWriter(stream, load_jskos_context())
+    process_records(marc.records(), writer, vocabularies=vocabularies)
+
+    records = [json.loads(line) for line in stream.getvalue().decode('utf-8').splitlines()]
+    assert len(writer) == len(records)
+    assert set(r['uri'] for r in records) == set(str(s) for s in expect.subjects(RDF.type, SKOS.Concept))
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_ndjson_writer_duplicates(jobs):
+    marc = MarcFileReader('examples/ddc23no-001.xml')
+    records = itertools.chain(marc.records(), marc.records())
+
+    stream = BytesIO()
+    writer = NDJSONWriter(stream, load_jskos_context())
+    process_records(records, writer, vocabularies=vocabularies, jobs=jobs)
+
+    # Each record is written as it is converted, so a duplicate gets its own
+    # line, also when the records are converted in the same batch by a worker
+    lines = stream.getvalue().decode('utf-8').splitlines()
+    assert len(lines) == 2
+    assert lines[0] == lines[1]
+
+
+@pytest.mark.parametrize('use_orjson', [False, True])
+def test_ndjson_writer_encoding(monkeypatch, use_orjson):
+    # orjson writes compact JSON, the json module uses the default separators
+    # and escapes. The content is the same either way.
+    if use_orjson:
+        monkeypatch.setattr(mc2skos.mc2skos, 'orjson', pytest.importorskip('orjson'))
+        expect = (u'{"@context":"https://gbv.github.io/jskos/context.json",'
+                  u'"notation":["001"],"prefLabel":{"nb":"Kunnskap og idéer"},'
+                  u'"uri":"http://dewey.info/class/001/e23/"}\n').encode('utf-8')
+    else:
+        monkeypatch.setattr(mc2skos.mc2skos, 'orjson', None)
+        expect = (b'{"@context": "https://gbv.github.io/jskos/context.json", '
+                  b'"notation": ["001"], "prefLabel": {"nb": "Kunnskap og id\\u00e9er"}, '
+                  b'"uri": "http://dewey.info/class/001/e23/"}\n')
+
+    stream = BytesIO()
+    writer = NDJSONWriter(stream, None)
+    writer.write({'uri': 'http://dewey.info/class/001/e23/', 'prefLabel': {'nb': u'Kunnskap og idéer'}, 'notation': ['001']})
+
+    assert stream.getvalue() == expect
+    assert json.loads(stream.getvalue().decode('utf-8'))['prefLabel']['nb'] == u'Kunnskap og idéer'
+
+
+def test_expand():
+    marc = MarcFileReader('examples/ddc23no-1--093-099.xml')
+    expect = process_records(marc.records(), vocabularies=vocabularies)
+    skosify.infer.skos_related(expect)
+    skosify.infer.skos_topConcept(expect)
+    skosify.infer.skos_hierarchical(expect, narrower=True)
+
+    graph = process_records(marc.records(), vocabularies=vocabularies, expand=True)
+
+    assert len(list(graph.subject_objects(SKOS.narrower))) > 0
+    assert isomorphic(graph, expect)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,8 @@ import pytest
 from lxml import etree
 from mc2skos.mc2skos import process_record, ClassificationRecord, Constants, InvalidRecordError
 from mc2skos.vocabularies import Vocabularies
+from mc2skos.record import parse_005, parse_008_date
+from datetime import datetime
 from rdflib.namespace import RDF, SKOS, Namespace
 from rdflib import URIRef, Literal, Graph, BNode
 
@@ -105,6 +107,64 @@ class TestClassificationRecord(unittest.TestCase):
         assert rec.display is False
         assert rec.synthesized is False
 
+    def testPublicOnly(self):
+        rec = '''
+        <mx:record xmlns:mx="http://www.loc.gov/MARC21/slim">
+            <mx:leader>00000nw  a2200000n  4500</mx:leader>
+            <mx:controlfield tag="008">091203baaaaaah</mx:controlfield>
+            <mx:datafield tag="084" ind2=" " ind1="0">
+                <mx:subfield code="a">ddc</mx:subfield>
+                <mx:subfield code="c">23no</mx:subfield>
+            </mx:datafield>
+            <mx:datafield tag="153" ind2=" " ind1=" ">
+                <mx:subfield code="a">820.1</mx:subfield>
+            </mx:datafield>
+            <mx:datafield tag="750" ind2=" " ind1=" ">
+                <mx:subfield code="a">Litteratur</mx:subfield>
+            </mx:datafield>
+        </mx:record>
+        '''
+
+        assert len(ClassificationRecord(rec, options=self.options).altLabel) == 1
+
+        options = dict(self.options, public_only=True)
+        rec = ClassificationRecord(rec, options=options)
+        assert rec.display is False
+        assert rec.notation == '820.1'
+        assert rec.altLabel == []
+        assert rec.is_public() is False
+
+    def testIndexTermControlNumber(self):
+        rec = ClassificationRecord('''
+        <mx:record xmlns:mx="http://www.loc.gov/MARC21/slim">
+            <mx:leader>00000nw  a2200000n  4500</mx:leader>
+            <mx:controlfield tag="008">091203aaaaaaaa</mx:controlfield>
+            <mx:datafield tag="084" ind2=" " ind1="0">
+                <mx:subfield code="a">ddc</mx:subfield>
+                <mx:subfield code="c">23no</mx:subfield>
+            </mx:datafield>
+            <mx:datafield tag="153" ind2=" " ind1=" ">
+                <mx:subfield code="a">820.1</mx:subfield>
+            </mx:datafield>
+            <mx:datafield tag="750" ind2="7" ind1=" ">
+                <mx:subfield code="a">Litteratur</mx:subfield>
+                <mx:subfield code="0">(NO-TrBIB)HUME12345</mx:subfield>
+                <mx:subfield code="2">humord</mx:subfield>
+            </mx:datafield>
+            <mx:datafield tag="750" ind2="7" ind1=" ">
+                <mx:subfield code="a">Poesi</mx:subfield>
+                <mx:subfield code="0">HUME23456</mx:subfield>
+                <mx:subfield code="2">humord</mx:subfield>
+            </mx:datafield>
+        </mx:record>
+        ''', options=self.options)
+
+        terms = rec.get_terms('7')
+        assert terms[0]['control_number'] == 'HUME12345'
+        assert terms[0]['control_number_identifier'] == 'NO-TrBIB'
+        assert terms[1]['control_number'] == 'HUME23456'
+        assert terms[1]['control_number_identifier'] is None
+
     def testSynthesizedNumberSpan(self):
         rec = ClassificationRecord('''
         <mx:record xmlns:mx="http://www.loc.gov/MARC21/slim">
@@ -536,5 +596,24 @@ class TestProcessRecord(unittest.TestCase):
                               URIRef(u'http://dewey.info/class/280.4/e23/')]
 
 
+class TestDates(unittest.TestCase):
+
+    def testParse005(self):
+        assert parse_005('20160707134215.0') == datetime(2016, 7, 7, 13, 42, 15)
+        assert parse_005('20160707134215.5') == datetime(2016, 7, 7, 13, 42, 15, 500000)
+        with pytest.raises(ValueError):
+            parse_005('20161307134215.0')
+        with pytest.raises(ValueError):
+            parse_005('2016070713')
+
+    def testParse008(self):
+        assert parse_008_date('680101') == datetime(2068, 1, 1)
+        assert parse_008_date('690101') == datetime(1969, 1, 1)
+        with pytest.raises(ValueError):
+            parse_008_date('170230')
+        with pytest.raises(ValueError):
+            parse_008_date('    ')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,6 +3,7 @@ import unittest
 import pytest
 from lxml import etree
 from mc2skos.mc2skos import Element
+from mc2skos.element import SUBFIELD
 
 
 class TestStringify(unittest.TestCase):
@@ -76,6 +77,63 @@ class TestStringify(unittest.TestCase):
         """))
         assert elem.stringify() == u'Inkluderer: Case-studier [tidligere 001.432]; utvalgsteknikker; rundspørringer, spørreskjemaer, feltarbeid, deltakende observasjon, intervjuer'
 
+    def testEmptySubfield(self):
+        # A subfield containing only a processing instruction has no text content
+        elem = Element(etree.fromstring(u"""
+            <datafield tag="685" ind1=" " ind2=" " xmlns="http://www.loc.gov/MARC21/slim">
+                <subfield code="i">Klassifiseres nå i</subfield>
+                <subfield code="t"><?ddc fotag="fo:inline" font-style="italic"?></subfield>
+                <subfield code="a">512.901</subfield>
+            </datafield>
+        """))
+        assert elem.stringify() == u'Klassifiseres nå i 512.901'
+
+    def testPrefetchedSubfields(self):
+        elem = Element(etree.fromstring(u"""
+            <datafield tag="680" ind1="1" ind2=" " xmlns="http://www.loc.gov/MARC21/slim">
+                <subfield code="i">Her:</subfield>
+                <subfield code="t">Addisjon</subfield>
+                <subfield code="i">,</subfield>
+                <subfield code="t">subtraksjon</subfield>
+                <subfield code="9">ess=nch</subfield>
+            </datafield>
+        """))
+        nodes = list(elem.node.iterchildren(SUBFIELD))
+        assert elem.stringify(nodes=nodes) == u'Her: Addisjon, subtraksjon'
+        assert elem.stringify(['t'], nodes=nodes) == u'Addisjon subtraksjon'
+
+
+class TestElement(unittest.TestCase):
+
+    def setUp(self):
+        self.elem = Element(etree.fromstring(u"""
+            <datafield tag="680" ind1="1" ind2=" " xmlns="http://www.loc.gov/MARC21/slim">
+                <subfield code="i">Her:</subfield>
+                <subfield code="t">Addisjon</subfield>
+                <subfield code="9">ess=nch</subfield>
+            </datafield>
+        """))
+
+    def testSimplePath(self):
+        assert self.elem.text('mx:subfield[@code="t"]') == u'Addisjon'
+        assert self.elem.first('mx:subfield[@code="x"]') is None
+
+    def testXPath(self):
+        # Expressions that ElementPath can't handle are evaluated as XPath
+        assert self.elem.text('mx:subfield[@code="t" or @code="9"]') == u'Addisjon'
+        assert self.elem.text('mx:subfield[last()]') == u'ess=nch'
+        assert self.elem.first('mx:subfield[position() = 2]').get('code') == 't'
+
+    def testTextAll(self):
+        assert self.elem.text('mx:subfield', all=True) == [u'Her:', u'Addisjon', u'ess=nch']
+
+    def testEssCodes(self):
+        assert self.elem.get_ess_codes() == ['nch']
+
+    def testReduce(self):
+        codes = self.elem.reduce(lambda acc, sf: acc + sf.get('code'), ['i', 't'])
+        assert codes == 'it'
+
 
 if __name__ == '__main__':
     unittest.main()